@@ -263,7 +263,6 @@ class CubeUpdater:
             print("\n" + "=" * 80)
             print("FIRMWARE UPDATE COMPLETE")
             print("=" * 80)
-            self.progress_ui.display_cube_progress()
 
             # Give a moment for all threads to clean up
             time.sleep(0.5)
@@ -79,6 +79,24 @@ class DroneCaNMonitor:
 
         return available_ports
 
+    def wait_for_interfaces(
+        self, expected_ports, min_count: int = 0, timeout: float = 10.0
+    ) -> bool:
+        """Wait for the CAN interface ports to come back after the Cubes were rebooted
+
+        The SLCAN interface only exists while the application firmware runs, so poll
+        until every port in expected_ports is back and at least min_count are present.
+        Returns False if they are not all back within timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            ports = set(self._detect_available_ports())
+            if len(ports) >= min_count and ports.issuperset(expected_ports):
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.25)
+
     def start_monitoring(self, port: str = None, node_id: int = None, bitrate: int = None):
         """Start DroneCAN monitoring with dynamic node allocation"""
         try:
@@ -239,8 +257,6 @@ class DroneCaNMonitor:
             try:
                 while self.running:
                     time.sleep(1)
-                    # Update progress display
-                    self.progress_ui.update_dronecan_status()
             except KeyboardInterrupt:
                 self._log_output("\nShutting down...")
                 self.running = False
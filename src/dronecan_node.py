@@ -17,6 +17,11 @@ if 'darwin' in sys.platform:
 else:
     dronecan.driver.slcan.TX_QUEUE_SIZE = 1000000
 
+# Device names are reported as com.cubepilot.<device_name>
+_DEVICE_NAME_RE = re.compile(r"com\.cubepilot\.(\w+)")
+_DEVICE_NAME_BYTES_RE = re.compile(rb"com\.cubepilot\.(\w+)")
+
+
 class RemoteDroneCANNode:
     """Represents a remote DroneCAN device discovered on the network"""
     def __init__(self, node_id: int, device_name: str, interface: str, bus_number: int):
@@ -84,6 +89,7 @@ class DroneCANNode:
         self.progress_ui = progress_ui
         self.firmware_dir = firmware_dir or Path("firmware")
         self.discovered_nodes: Dict[int, RemoteDroneCANNode] = {}
+        self._by_unique_id: Dict[int, RemoteDroneCANNode] = {}  # unique_id as int -> node
         self.lock = threading.Lock()
         self.new_node_callback: Optional[Callable] = None
         self.node_removed_callback: Optional[Callable] = None
@@ -293,6 +299,8 @@ class DroneCANNode:
 
                 # Remove from discovered nodes
                 del self.discovered_nodes[node_id]
+                if remote_node.unique_id is not None:
+                    self._by_unique_id.pop(int.from_bytes(remote_node.unique_id, "little"), None)
 
                 # Remove from processed_nodes to allow re-processing if node comes back
                 del self.processed_nodes[node_id]
@@ -320,18 +328,11 @@ class DroneCANNode:
             # Create or update node record
             with self.lock:
                 # Extract unique_id to check for existing device with different node_id
-                unique_id = bytes(node_info.hardware_version.unique_id)
-                
+                uid_int = int.from_bytes(node_info.hardware_version.unique_id, "little")
+
                 # Check if we already know this device by unique_id (node_id might have changed)
-                existing_node = None
-                old_node_id = None
-                
-                # Search for existing node by unique_id
-                for existing_id, remote_node in self.discovered_nodes.items():
-                    if remote_node.unique_id == unique_id:
-                        existing_node = remote_node
-                        old_node_id = existing_id
-                        break
+                existing_node = self._by_unique_id.get(uid_int)
+                old_node_id = existing_node.node_id if existing_node else None
                 if node_id in self.discovered_nodes.keys():
                     # Set software version
                     version_str = f"{node_info.software_version.major}.{node_info.software_version.minor}"
@@ -400,7 +401,7 @@ class DroneCANNode:
                     self._log_to_console(f"{str(remote_node)} identified as {device_name}")
 
                     remote_node.hardware_version = f"{node_info.hardware_version.major}.{node_info.hardware_version.minor}"
-                    remote_node.unique_id = bytes(node_info.hardware_version.unique_id)
+                    remote_node.unique_id = uid_int.to_bytes(16, "little")
                     remote_node.last_seen = time.time()
 
                     # Find firmware file for this device
@@ -413,6 +414,7 @@ class DroneCANNode:
                     else:
                         self._log_to_console(f"{str(remote_node)} no firmware available")
                     self.discovered_nodes[node_id] = remote_node
+                    self._by_unique_id[uid_int] = remote_node
 
                     # Add to progress UI with interface information
                     interface_name = f"{self.port} CAN{self.bus_number}"
@@ -454,13 +456,25 @@ class DroneCANNode:
             # The device name should be in the software version or name field
             # Format: com.cubepilot.device_name
 
-            # Try name field first (most common location for Here4)
+            # Try name field first (most common location for Here4), scanning the raw
+            # bytes so the common case never has to stringify the dronecan object
             if node_info.name:
-                name_info = str(node_info.name)
-                if "com.cubepilot." in name_info:
-                    result = self._parse_device_name(name_info)
-                    if result:
-                        return result
+                try:
+                    name_bytes = bytes(node_info.name)
+                except (TypeError, ValueError):
+                    name_bytes = None
+
+                if name_bytes is not None:
+                    if b"com.cubepilot." in name_bytes:
+                        match = _DEVICE_NAME_BYTES_RE.search(name_bytes)
+                        if match:
+                            return f"com.cubepilot.{match.group(1).decode('ascii')}"
+                else:
+                    name_info = str(node_info.name)
+                    if "com.cubepilot." in name_info:
+                        result = self._parse_device_name(name_info)
+                        if result:
+                            return result
 
             # Try software version
             if node_info.software_version:
@@ -486,7 +500,7 @@ class DroneCANNode:
     def _parse_device_name(self, text: str) -> Optional[str]:
         """Parse device name from text containing com.cubepilot.device_name"""
         try:
-            match = re.search(r"com\.cubepilot\.(\w+)", text)
+            match = _DEVICE_NAME_RE.search(text)
             if match:
                 device_name = f"com.cubepilot.{match.group(1)}"
                 return device_name
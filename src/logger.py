@@ -6,6 +6,15 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
+# Level names accepted by the log_* helpers, anything else logs at INFO
+_LEVEL_MAP = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL,
+}
+
 
 class DroneCANLogger:
     """Centralized logging system for DroneCAN Batch Updater"""
@@ -99,20 +108,8 @@ class DroneCANLogger:
         
     def _log_to_logger(self, logger: logging.Logger, message: str, level: str):
         """Helper to log to a specific logger with the given level"""
-        level = level.upper()
-        if level == "DEBUG":
-            logger.debug(message)
-        elif level == "INFO":
-            logger.info(message)
-        elif level == "WARNING":
-            logger.warning(message)
-        elif level == "ERROR":
-            logger.error(message)
-        elif level == "CRITICAL":
-            logger.critical(message)
-        else:
-            logger.info(message)
-            
+        logger.log(_LEVEL_MAP.get(level.upper(), logging.INFO), message)
+
     def get_log_files(self) -> dict:
         """Get paths to all log files for this session"""
         return {
@@ -2,18 +2,19 @@
 
 import argparse
 import multiprocessing
-import os
 import sys
 import threading
-import time
 from pathlib import Path
 
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
 
-# Add src directory to path for imports
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# Sibling modules resolve directly: running src/main.py puts src/ first on sys.path
+from cube_updater import CubeUpdater
+from dronecan_monitor import DroneCaNMonitor
+from progress_ui import ProgressUI
+from logger import get_logger, shutdown_logger
 
 
 def get_resource_path(relative_path):
@@ -33,13 +34,6 @@ def get_resource_path(relative_path):
     return Path(base_path) / relative_path
 
 
-# pylint: disable=wrong-import-position
-from cube_updater import CubeUpdater
-from dronecan_monitor import DroneCaNMonitor
-from progress_ui import ProgressUI
-from logger import get_logger, shutdown_logger
-
-
 class BatchFirmwareUpdater:
     def __init__(self, auto_yes=False, skip_firmware=False):
         self.console = Console()
@@ -64,6 +58,10 @@ class BatchFirmwareUpdater:
         try:
             self.print_banner()
 
+            # Cubes touched in Phase A are rebooted, Phase B must wait for them to come back
+            cube_devices = []
+            interface_ports = set()
+
             if not self.skip_cube_update:
                 # Phase A: Cube Detection and Update (One-time)
                 self.console.print("[bold yellow]Phase A: Cube Firmware Update[/bold yellow]")
@@ -79,6 +77,9 @@ class BatchFirmwareUpdater:
                     )
                     return 1
 
+                # Remember the CAN interfaces that are up before detection reboots the Cubes
+                interface_ports = set(self.dronecan_monitor._detect_available_ports())
+
                 # Detect connected Cube devices
                 self.progress_ui.add_console_output("Scanning for connected Cube devices...")
                 cube_devices = self.cube_updater.detect_devices()
@@ -103,9 +104,14 @@ class BatchFirmwareUpdater:
                             )
                             proceed = True
                         else:
-                            response = input(
-                                f"Update {len(devices_needing_update)} Cube(s)? (y/N): "
-                            )
+                            # Pause the live display so it doesn't repaint over the prompt
+                            self.progress_ui.pause()
+                            try:
+                                response = input(
+                                    f"Update {len(devices_needing_update)} Cube(s)? (y/N): "
+                                )
+                            finally:
+                                self.progress_ui.resume()
                             proceed = response.lower() in ["y", "yes"]
 
                         if proceed:
@@ -135,11 +141,16 @@ class BatchFirmwareUpdater:
                     "Cube firmware update phase skipped (--skip-cube-update flag)"
                 )
 
-            self.progress_ui.add_console_output("Phase B: DroneCAN Continuous Monitoring")
-            self.progress_ui.add_console_output("Starting DroneCAN monitoring mode...")
-            time.sleep(6)
-
             # Phase B: DroneCAN Continuous Mode - Multi-interface support
+            self.progress_ui.add_console_output("Phase B: DroneCAN Continuous Monitoring")
+            if cube_devices:
+                self.progress_ui.add_console_output("Waiting for Cubes to restart...")
+                if not self.dronecan_monitor.wait_for_interfaces(
+                    interface_ports, min_count=len(cube_devices)
+                ):
+                    self.progress_ui.add_console_output(
+                        "Not all CAN interfaces came back, continuing with the ones present"
+                    )
             self.progress_ui.add_console_output("Starting DroneCAN monitoring mode...")
             self.progress_ui.add_console_output("Dynamic Node Allocation Server: Starting...")
             # DroneCAN monitor now handles its own threading and multi-interface support
@@ -158,7 +169,8 @@ class BatchFirmwareUpdater:
             self.logger.log_main(f"Application error: {str(e)}", "ERROR")
             return 1
         finally:
-            # Always shutdown logger when exiting
+            # Stop the live display and shutdown logger when exiting
+            self.progress_ui.shutdown()
             shutdown_logger()
 
 
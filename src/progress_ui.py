@@ -1,17 +1,30 @@
 #!/usr/bin/env python3
 
+import signal
+import sys
 import threading
 import time
+from collections import deque
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from itertools import chain, islice
+from typing import Deque, Dict, Optional, Set, Tuple
 
-from rich.console import Console
+from rich.console import Console, Group
 from rich.live import Live
 from rich.panel import Panel
 from rich.table import Table
+from rich.text import Text
 
+from logger import get_logger
 
-@dataclass
+# Progress bars are 20 characters wide (5% per character), so there are only 21 bodies
+_BAR_CACHE = tuple(f"[cyan]{'█' * i}[/cyan]{'░' * (20 - i)}" for i in range(21))
+_BAR_FAILED = "[red]████████████████████[/red] Failed"
+_BAR_COMPLETE = "[green]████████████████████[/green] 100% Complete ✓"
+_BAR_QUEUED = "[dim]░░░░░░░░░░░░░░░░░░░░[/dim] 0% Queued"
+
+
+@dataclass(slots=True)
 class DeviceStatus:
     name: str
     port: str
@@ -20,6 +33,7 @@ class DeviceStatus:
     progress: float = 0.0
     error_msg: Optional[str] = None
     interface: Optional[str] = None  # For DroneCAN devices, track which interface they're on
+    display_name: str = ""  # Device column text, formatted once when the device is added
 
 
 class ProgressUI:
@@ -28,36 +42,79 @@ class ProgressUI:
         self.cube_devices: Dict[str, DeviceStatus] = {}
         self.dronecan_devices: Dict[str, DeviceStatus] = {}
         self.active_interfaces: Dict[str, str] = {}  # interface_name -> status
-        self.lock = threading.Lock()
-        self.console_buffer: List[str] = []
+        self.lock = threading.RLock()
         self.max_buffer_lines = 100
+        self.console_buffer: Deque[str] = deque(maxlen=self.max_buffer_lines)
         self._last_refresh_time = 0.0
         self._refresh_throttle = 0.1  # Minimum 100ms between refreshes
         self._display_active = False  # Always track display state
+        self._live: Optional[Live] = None
+        self._render_error_count = 0
+
+        # Producers only flag the display as dirty; a single render thread draws frames
+        self._dirty = threading.Event()
+        self._stop = threading.Event()
+        self._render_thread: Optional[threading.Thread] = None
+        self._backoff = self._refresh_throttle  # Grows up to 500ms while nothing changes
+        self._last_state_hash: Optional[int] = None
+
+        # Formatted (device name, progress bar) cells by device_id, rebuilt only when dirty
+        self._row_cache: Dict[str, Tuple[str, str]] = {}
+        self._dirty_ids: Set[str] = set()
+
+        # Bumped on every device mutation; the renderer only re-snapshots when it changes
+        self._devices_version = 0
+        self._snapshot_version = -1
+        self._snapshot_cubes: Tuple[Tuple[str, DeviceStatus], ...] = ()
+        self._snapshot_dronecan: Tuple[Tuple[str, DeviceStatus], ...] = ()
+
+        # Terminal size is re-queried at most once a second, or right after a resize
+        self._cached_size = self.console.size
+        self._size_ts = 0.0
+        self._prev_sigwinch = None  # Handler to put back on shutdown, None if not installed
 
     def add_cube_device(self, device_id: str, name: str, port: str, device_type: str):
         with self.lock:
             self.cube_devices[device_id] = DeviceStatus(
-                name=name, port=port, device_type=device_type, status="queued"
+                name=name,
+                port=port,
+                device_type=device_type,
+                status="queued",
+                display_name=f"{name} ({port})" if name else port,
             )
+            self._mark_device_dirty(device_id)
 
     def add_dronecan_device(self, device_id: str, name: str, node_id: str, device_type: str, interface: str = None, status: str = "queued"):
         with self.lock:
             # Only add if device doesn't already exist to avoid resetting status
             if device_id not in self.dronecan_devices:
+                display_name = f"{name} [Node {node_id}]" if name else f"Node {node_id}"
+                if interface:
+                    display_name += f" ({interface})"
                 self.dronecan_devices[device_id] = DeviceStatus(
-                    name=name, port=node_id, device_type=device_type, status=status, interface=interface
+                    name=name,
+                    port=node_id,
+                    device_type=device_type,
+                    status=status,
+                    interface=interface,
+                    display_name=display_name,
                 )
+                self._mark_device_dirty(device_id)
+
+    def _mark_device_dirty(self, device_id: str):
+        """Record a device mutation, caller must hold self.lock"""
+        self._dirty_ids.add(device_id)
+        self._devices_version += 1
 
     def remove_dronecan_device(self, device_id: str):
         """Remove a DroneCAN device from tracking"""
         with self.lock:
             if device_id in self.dronecan_devices:
                 del self.dronecan_devices[device_id]
+                self._mark_device_dirty(device_id)
 
         # Always refresh display when removing a device
-        if self._display_active:
-            self._refresh_display()
+        self._dirty.set()
 
     def register_interface(self, interface_name: str, status: str = "Monitoring"):
         """Register an active interface for monitoring"""
@@ -71,20 +128,23 @@ class ProgressUI:
                 self.active_interfaces[interface_name] = status
 
         # Refresh display when interface status changes
-        if self._display_active:
-            self._refresh_display()
+        self._dirty.set()
 
     def add_console_output(self, line: str):
         """Add a line to the console buffer"""
-        if line.strip():  # Only add non-empty lines
-            with self.lock:
-                self.console_buffer.append(line.strip())
-                # Keep buffer size manageable
-                if len(self.console_buffer) > self.max_buffer_lines:
-                    self.console_buffer = self.console_buffer[-self.max_buffer_lines :]
+        stripped = line.strip()
+        if not stripped:  # Only add non-empty lines
+            return
 
-            # Refresh outside of the lock to avoid deadlock
-            self._refresh_display()
+        with self.lock:
+            # Repeated lines (e.g. scanning messages) don't change the display
+            if self.console_buffer and self.console_buffer[-1] == stripped:
+                return
+            # deque drops the oldest line once max_buffer_lines is reached
+            self.console_buffer.append(stripped)
+
+        # Signal the render thread outside of the lock
+        self._dirty.set()
 
     def update_cube_progress(
         self,
@@ -94,20 +154,101 @@ class ProgressUI:
         error_msg: Optional[str] = None,
     ):
         with self.lock:
-            if device_id in self.cube_devices:
-                self.cube_devices[device_id].status = status
-                self.cube_devices[device_id].progress = progress
-                self.cube_devices[device_id].error_msg = error_msg
+            device = self.cube_devices.get(device_id)
+            if device is None:
+                return
+            # Drop sub-percent progress ticks, the bar only shows whole percents
+            if (
+                device.status == status
+                and device.error_msg == error_msg
+                and abs(device.progress - progress) < 1.0
+            ):
+                return
+            device.status = status
+            device.progress = progress
+            device.error_msg = error_msg
+            self._mark_device_dirty(device_id)
 
-        # Refresh outside of the lock to avoid deadlock  
-        self._refresh_display()
+        # Signal the render thread outside of the lock
+        self._dirty.set()
 
 
     def start_progress_display(self):
         """Initialize the unified progress display for both Cube and DroneCAN devices"""
-        # Start the unified display system
+        # Rich Live owns the screen and only repaints what changed between frames.
+        # Its own refresh thread is off, so only the render loop below writes frames
+        self._display_active = True
+        self._live = Live(
+            self._build_renderable(),
+            console=self.console,
+            auto_refresh=False,
+            transient=False,
+        )
+        self._live.start(refresh=True)
+
+        # Invalidate the cached terminal size as soon as the window is resized
+        if sys.platform != "win32":
+            try:
+                # signal() returns None for handlers not installed from Python, treat as default
+                prev = signal.signal(signal.SIGWINCH, self._on_resize)
+                self._prev_sigwinch = signal.SIG_DFL if prev is None else prev
+            except ValueError:
+                pass  # Signal handlers can only be installed from the main thread
+
+        self._start_render_thread()
+
+    def _start_render_thread(self):
+        """Start the background thread that draws coalesced frames"""
+        self._stop.clear()
+        self._render_thread = threading.Thread(target=self._render_loop, daemon=True)
+        self._render_thread.start()
+
+    def _stop_render_thread(self):
+        """Stop the render thread, so the caller is the only one building frames"""
+        self._stop.set()
+        self._dirty.set()  # Wake the render thread so it can exit
+        if self._render_thread is not None:
+            self._render_thread.join(timeout=1.0)
+            self._render_thread = None
+
+    def pause(self):
+        """Stop the live display so the terminal can be used for an interactive prompt"""
+        self._display_active = False
+        self._stop_render_thread()
+        if self._live is not None:
+            # Leave the current state on screen above the prompt
+            self._live.update(self._build_renderable(), refresh=True)
+            self._live.stop()
+
+    def resume(self):
+        """Restart the live display after pause()"""
+        if self._live is None:
+            return
+        self._live.start()
         self._display_active = True
-        self._render_unified_display()
+        # Force a fresh frame even if nothing changed while paused
+        self._last_state_hash = None
+        self._start_render_thread()
+        self._dirty.set()
+
+    def shutdown(self):
+        """Stop the live display, leaving the last frame on screen"""
+        self._display_active = False
+        self._stop_render_thread()
+
+        # Don't leave the resize handler pointing at a dead UI
+        if self._prev_sigwinch is not None:
+            try:
+                signal.signal(signal.SIGWINCH, self._prev_sigwinch)
+            except ValueError:
+                pass  # Not on the main thread, the handler stays but is harmless
+            self._prev_sigwinch = None
+
+        if self._live is not None:
+            # Paint the final state, throttled updates may not have been rendered yet
+            self._live.update(self._build_renderable(), refresh=True)
+            self._live.stop()
+            self._live = None
 
     def update_dronecan_progress(
         self,
@@ -117,384 +258,215 @@ class ProgressUI:
         error_msg: Optional[str] = None,
     ):
         with self.lock:
-            if device_id in self.dronecan_devices:
-                self.dronecan_devices[device_id].status = status
-                self.dronecan_devices[device_id].progress = progress
-                self.dronecan_devices[device_id].error_msg = error_msg
+            device = self.dronecan_devices.get(device_id)
+            if device is None:
+                return
+            # Drop sub-percent progress ticks, the bar only shows whole percents
+            if (
+                device.status == status
+                and device.error_msg == error_msg
+                and abs(device.progress - progress) < 1.0
+            ):
+                return
+            device.status = status
+            device.progress = progress
+            device.error_msg = error_msg
+            self._mark_device_dirty(device_id)
 
-        # Refresh the unified display
-        self._refresh_display()
+        # Signal the render thread to refresh the unified display
+        self._dirty.set()
 
     def _refresh_display(self):
-        """Manually refresh the unified display with throttling"""
-        if not self._display_active:
-            return
-
-        current_time = time.time()
-        if current_time - self._last_refresh_time < self._refresh_throttle:
-            return  # Skip refresh if too recent
-
-        self._last_refresh_time = current_time
-        self._render_unified_display()
+        """Request a refresh of the unified display from the render thread"""
+        self._dirty.set()
+
+    def _render_loop(self):
+        """Render frames on a background thread, coalescing bursts of updates into one"""
+        while not self._stop.is_set():
+            self._dirty.wait()
+
+            # The single display-state check: producers always signal, and
+            # updates made while paused are picked up by resume()
+            if not self._display_active:
+                self._dirty.clear()
+                continue
+
+            # Let further updates pile up until the throttle interval has passed
+            elapsed = time.monotonic() - self._last_refresh_time
+            if elapsed < self._backoff and self._stop.wait(self._backoff - elapsed):
+                break  # Stopped by pause() or shutdown(), which draw the frame themselves
+
+            self._dirty.clear()
+
+            # Skip frames that would look identical and back off until something changes
+            state_hash = self._state_hash()
+            if state_hash == self._last_state_hash:
+                self._backoff = min(0.5, self._backoff * 2)
+                continue
+            self._last_state_hash = state_hash
+            self._backoff = self._refresh_throttle
+
+            self._last_refresh_time = time.monotonic()
+            self._render_unified_display()
+
+    def _state_hash(self) -> int:
+        """Hash of everything visible in a frame, used to detect no-op refreshes"""
+        with self.lock:
+            devices = chain(self.cube_devices.items(), self.dronecan_devices.items())
+            tail_start = max(0, len(self.console_buffer) - 8)
+            return hash(
+                (
+                    tuple(
+                        (device_id, d.status, round(d.progress), d.error_msg)
+                        for device_id, d in devices
+                    ),
+                    tuple(islice(self.console_buffer, tail_start, None)),
+                    tuple(self.active_interfaces.items()),
+                    tuple(self._terminal_size()),
+                )
+            )
 
     def _render_unified_display(self):
         """Render unified display for both Cube and DroneCAN devices"""
-        if not self._display_active:
+        if self._live is None:
             return
 
         try:
-            # Get terminal dimensions
-            terminal_height = self.console.size.height
-            terminal_width = self.console.size.width
+            self._live.update(self._build_renderable(), refresh=True)
+        except (OSError, SystemExit):
+            # The terminal is gone, stop rendering for good. Rich turns a BrokenPipeError
+            # into SystemExit (Console.on_broken_pipe), which would silently end this thread
+            self._disable_display()
+        except Exception as e:
+            # Tolerate the odd bad frame, but don't keep throwing on every refresh
+            self._render_error_count += 1
+            if self._render_error_count > 5:
+                self._disable_display()
+                get_logger().log_main(
+                    f"Disabling progress UI after repeated render errors: {e}", "ERROR"
+                )
+
+    def _disable_display(self):
+        """Stop Live for good from the render thread, so nothing writes to the terminal"""
+        self._display_active = False
+        live, self._live = self._live, None
+        try:
+            live.stop()
+        except Exception:
+            pass  # Stopping repaints the last frame, which fails on a broken terminal
+
+    def _on_resize(self, _signum, _frame):
+        """SIGWINCH handler, forces the next frame to re-query the terminal size"""
+        self._size_ts = 0.0
+
+    def _terminal_size(self):
+        """Return the console size, cached for up to one second"""
+        now = time.monotonic()
+        if now - self._size_ts > 1.0:
+            self._cached_size = self.console.size
+            self._size_ts = now
+        return self._cached_size
+
+    def _build_renderable(self) -> Group:
+        """Build the console and progress panels for the unified display"""
+        # Get terminal dimensions
+        terminal_size = self._terminal_size()
+        terminal_height = terminal_size.height
+        terminal_width = terminal_size.width
+
+        # Snapshot all shared state in a single critical section, format outside it
+        with self.lock:
+            if self._snapshot_version != self._devices_version:
+                self._snapshot_cubes = tuple(self.cube_devices.items())
+                self._snapshot_dronecan = tuple(self.dronecan_devices.items())
+                self._snapshot_version = self._devices_version
+            cube_devices = self._snapshot_cubes
+            dronecan_devices = self._snapshot_dronecan
 
             # Calculate total device count for layout
-            total_devices = len(self.cube_devices) + len(self.dronecan_devices)
+            total_devices = len(cube_devices) + len(dronecan_devices)
             device_tree_lines = max(1, total_devices + 4) if total_devices > 0 else 1
             progress_panel_height = device_tree_lines + 4
 
             # Reserve space for progress panel and margins
             available_console_lines = max(3, terminal_height - progress_panel_height - 4)
+            skip = max(0, len(self.console_buffer) - available_console_lines)
+            console_lines = list(islice(self.console_buffer, skip, None))
 
-            # Get snapshot of current state
-            with self.lock:
-                console_lines = (
-                    self.console_buffer[-available_console_lines:] if self.console_buffer else []
-                )
-                cube_devices_copy = dict(self.cube_devices)
-                dronecan_devices_copy = dict(self.dronecan_devices)
-
-            # Clear screen and move to top
-            self.console.clear()
-
-            # Display console output section
-            if console_lines:
-                max_content_width = max(40, terminal_width - 8)
-                truncated_lines = []
-                for line in console_lines:
-                    if len(line) > max_content_width:
-                        truncated_lines.append(line[:max_content_width - 3] + "...")
-                    else:
-                        truncated_lines.append(line)
-
-                console_content = "\n".join(truncated_lines)
-                console_panel = Panel(
+            dirty_ids = self._dirty_ids
+            self._dirty_ids = set()
+
+        renderables = []
+
+        # Console output section
+        if console_lines:
+            max_content_width = max(40, terminal_width - 8)
+            truncated_lines = []
+            for line in console_lines:
+                if len(line) > max_content_width:
+                    truncated_lines.append(line[:max_content_width - 3] + "...")
+                else:
+                    truncated_lines.append(line)
+
+            console_content = "\n".join(truncated_lines)
+            renderables.append(
+                Panel(
                     console_content,
                     title="[bold green]Update Console[/bold green]",
                     title_align="left",
                     width=min(terminal_width, 120),
                 )
-                self.console.print(console_panel)
-                self.console.print()
-
-            # Create unified progress section
-            if not cube_devices_copy and not dronecan_devices_copy:
-                progress_panel = Panel(
-                    "[dim]No devices[/dim]",
-                    title="[bold cyan]Firmware Update Progress[/bold cyan]",
-                    width=min(terminal_width, 120),
-                )
-            else:
-                # Create simplified device table - only Device and Progress
-                table = Table(show_header=True, header_style="bold magenta")
-                table.add_column("Device", style="cyan", width=30)
-                table.add_column("Progress", style="white", width=40)
-
-                # Add Cube devices
-                for device_id, device in cube_devices_copy.items():
-                    progress_bar = self._create_progress_bar(device.progress, device.status)
-                    device_name = f"{device.name} ({device.port})" if device.name else device.port
-                    table.add_row(device_name, progress_bar)
-
-                # Add DroneCAN devices
-                for device_id, device in dronecan_devices_copy.items():
-                    progress_bar = self._create_progress_bar(device.progress, device.status)
-                    device_name = f"{device.name} [Node {device.port}]" if device.name else f"Node {device.port}"
-                    if device.interface:
-                        device_name += f" ({device.interface})"
-                    table.add_row(device_name, progress_bar)
-
-                progress_panel = Panel(
-                    table,
-                    title="[bold cyan]Firmware Update Progress[/bold cyan]",
-                    width=min(terminal_width, 120),
-                )
+            )
+            renderables.append(Text(""))  # Blank line between the two panels
+
+        # Create unified progress section
+        if not cube_devices and not dronecan_devices:
+            progress_panel = Panel(
+                "[dim]No devices[/dim]",
+                title="[bold cyan]Firmware Update Progress[/bold cyan]",
+                width=min(terminal_width, 120),
+            )
+        else:
+            # Create simplified device table - only Device and Progress
+            table = Table(show_header=True, header_style="bold magenta")
+            table.add_column("Device", style="cyan", width=30)
+            table.add_column("Progress", style="white", width=40)
+
+            # Reuse cached rows, only re-formatting devices that changed since the last frame.
+            # Rebuilding the dict also drops rows of removed devices.
+            row_cache = {}
+            for device_id, device in chain(cube_devices, dronecan_devices):
+                row = None if device_id in dirty_ids else self._row_cache.get(device_id)
+                if row is None:
+                    row = self._format_row(device)
+                row_cache[device_id] = row
+                table.add_row(*row)
+            self._row_cache = row_cache
+
+            progress_panel = Panel(
+                table,
+                title="[bold cyan]Firmware Update Progress[/bold cyan]",
+                width=min(terminal_width, 120),
+            )
+        renderables.append(progress_panel)
 
-            self.console.print(progress_panel)
+        # One Group lets Rich measure and write both panels in a single pass
+        return Group(*renderables)
 
-        except Exception:
-            # Fallback if rendering fails
-            pass
+    def _format_row(self, device: DeviceStatus) -> Tuple[str, str]:
+        """Format the (device name, progress bar) cells for a device"""
+        return device.display_name, self._create_progress_bar(device.progress, device.status)
 
     def _create_progress_bar(self, progress: float, status: str) -> str:
         """Create a visual progress bar"""
         if status == "failed":
-            return "[red]████████████████████[/red] Failed"
+            return _BAR_FAILED
         elif status == "complete":
-            return "[green]████████████████████[/green] 100% Complete ✓"
+            return _BAR_COMPLETE
         elif progress > 0:
-            filled = int(progress / 5)  # 20 chars total, so each char = 5%
-            empty = 20 - filled
-            bar = "[cyan]" + "█" * filled + "[/cyan]" + "░" * empty
-            return f"{bar} {progress:.0f}% {status.title()}"
+            return f"{_BAR_CACHE[min(int(progress / 5), 20)]} {progress:.0f}% {status.title()}"
         else:
-            return "[dim]░░░░░░░░░░░░░░░░░░░░[/dim] 0% Queued"
-
-    def _create_device_tree(self, devices: Dict[str, DeviceStatus], title: str) -> Table:
-        """Create a table showing device status"""
-        table = Table(show_header=False, box=None, pad_edge=False)
-        table.add_column("Device", style="dim")
-        table.add_column("Progress", min_width=40)
-
-        # For DroneCAN devices, show ALL active interfaces
-        if title == "DroneCAN Devices":
-            # Show all active interfaces first
-            with self.lock:
-                active_interfaces = dict(self.active_interfaces)
-            
-            if not active_interfaces and not devices:
-                table.add_row("  No interfaces", "[dim]None monitoring[/dim]")
-                return table
-
-            # Group devices by interface
-            device_by_interface = {}
-            for device in devices.values():
-                interface = device.interface or "Unknown Interface"
-                if interface not in device_by_interface:
-                    device_by_interface[interface] = []
-                device_by_interface[interface].append(device)
-
-            # Show each active interface
-            for interface_name, status in active_interfaces.items():
-                interface_devices = device_by_interface.get(interface_name, [])
-                device_count = len(interface_devices)
-                
-                # Interface header with status
-                if device_count > 0:
-                    status_text = f"{status} ({device_count} device{'s' if device_count != 1 else ''})"
-                else:
-                    status_text = f"{status} (0 devices)"
-                
-                table.add_row(f"[bold cyan]📡 {interface_name}[/bold cyan]", f"[dim]{status_text}[/dim]")
-                
-                # Show devices under this interface
-                for device in interface_devices:
-                    device_name = f"  └─ {device.port} ({device.name})" if device.name else f"  └─ {device.port}"
-                    progress_bar = self._create_progress_bar(device.progress, device.status)
-
-                    if device.error_msg:
-                        device_name += f" [red]({device.error_msg})[/red]"
-
-                    table.add_row(device_name, progress_bar)
-        else:
-            # Group by device type for Cube devices or fallback
-            if not devices:
-                table.add_row("  No devices", "[dim]None detected[/dim]")
-                return table
-                
-            device_types = {}
-            for device in devices.values():
-                if device.device_type not in device_types:
-                    device_types[device.device_type] = []
-                device_types[device.device_type].append(device)
-
-            for device_type, type_devices in device_types.items():
-                for i, device in enumerate(type_devices):
-                    device_name = f"{device.port} ({device.name})" if device.name else device.port
-                    progress_bar = self._create_progress_bar(device.progress, device.status)
-
-                    if device.error_msg:
-                        device_name += f" [red]({device.error_msg})[/red]"
-
-                    table.add_row(device_name, progress_bar)
-
-        return table
-
-    def display_cube_progress(self):
-        """Display current cube update progress"""
-        with self.lock:
-            if not self.cube_devices:
-                return
-
-            table = self._create_device_tree(self.cube_devices, "Cube Devices")
-            self.console.print()
-            self.console.print(
-                Panel(
-                    table,
-                    title="[bold yellow]Cube Firmware Update Progress[/bold yellow]",
-                )
-            )
-
-    def display_dronecan_progress(self):
-        """Display current DroneCAN update progress"""
-        with self.lock:
-            table = self._create_device_tree(self.dronecan_devices, "DroneCAN Devices")
-            return Panel(table, title="[bold cyan]DroneCAN Devices[/bold cyan]")
-
-
-    def start_cube_live_display(self):
-        """Start live updating display for Cube firmware updates with console output above"""
-        # Instead of using Rich Live, use a simple approach with manual updates
-        self._display_active = True
-        self._render_display()
-
-
-    def _render_dronecan_display(self):
-        """Render the DroneCAN display state with console output above progress"""
-        if not self._display_active:
-            return
-
-        try:
-            # Get terminal dimensions
-            terminal_height = self.console.size.height
-            terminal_width = self.console.size.width
-
-            # Calculate device tree height for progress panel
-            device_count = len(self.dronecan_devices)
-            device_tree_lines = (
-                max(1, device_count + 2) if device_count > 0 else 1
-            )  # +2 for headers and spacing
-            progress_panel_height = device_tree_lines + 4  # +4 for panel borders and title
-
-            # Reserve space for progress panel and some margin
-            available_console_lines = max(
-                3, terminal_height - progress_panel_height - 4
-            )  # -4 for spacing and margins
-
-            # Get a snapshot of the current state
-            with self.lock:
-                console_lines = (
-                    self.console_buffer[-available_console_lines:] if self.console_buffer else []
-                )
-                dronecan_devices_copy = dict(self.dronecan_devices)
-
-            # Clear screen and move to top
-            self.console.clear()
-
-            # Display console output section (limit content width)
-            if console_lines:
-                # Truncate long lines to fit terminal width
-                max_content_width = max(40, terminal_width - 8)  # Leave 8 chars for panel borders
-                truncated_lines = []
-                for line in console_lines:
-                    if len(line) > max_content_width:
-                        truncated_lines.append(line[: max_content_width - 3] + "...")
-                    else:
-                        truncated_lines.append(line)
-
-                console_content = "\n".join(truncated_lines)
-                console_panel = Panel(
-                    console_content,
-                    title="[bold green]DroneCAN Update Console[/bold green]",
-                    title_align="left",
-                    width=min(terminal_width, 120),  # Cap width to prevent overflow
-                )
-                self.console.print(console_panel)
-                self.console.print()
-
-            # Create progress section
-            if not dronecan_devices_copy:
-                progress_panel = Panel(
-                    "[dim]No DroneCAN devices[/dim]",
-                    title="[bold cyan]DroneCAN Firmware Update Progress[/bold cyan]",
-                    width=min(terminal_width, 120),
-                )
-            else:
-                # Use the interface-aware device tree creation
-                table = self._create_device_tree(dronecan_devices_copy, "DroneCAN Devices")
-
-                progress_panel = Panel(
-                    table,
-                    title="[bold cyan]DroneCAN Firmware Update Progress[/bold cyan]",
-                    width=min(terminal_width, 120),
-                )
-
-            self.console.print(progress_panel)
-
-        except Exception:
-            # Fallback if rendering fails
-            pass
-
-    def _render_display(self):
-        """Render the current display state"""
-        if not self._display_active:
-            return
-
-        try:
-            # Calculate console buffer size based on terminal height
-            terminal_height = self.console.size.height
-            # Reserve space for progress panel (estimated 6-8 lines) and some margin
-            progress_panel_lines = max(
-                6, len(self.cube_devices) * 2 + 4
-            )  # Estimate progress panel height
-            available_console_lines = max(
-                5, terminal_height - progress_panel_lines - 2
-            )  # Leave 2 lines margin
-
-            # Get a snapshot of the current state
-            with self.lock:
-                console_lines = (
-                    self.console_buffer[-available_console_lines:] if self.console_buffer else []
-                )
-                cube_devices_copy = dict(self.cube_devices)
-
-            # Create progress section
-            if not cube_devices_copy:
-                progress_panel = Panel(
-                    "[dim]No cube devices[/dim]",
-                    title="[bold yellow]Cube Firmware Update Progress[/bold yellow]",
-                )
-            else:
-                # Create device tree from the snapshot
-                table = Table(show_header=False, box=None, pad_edge=False)
-                table.add_column("Device", style="dim")
-                table.add_column("Progress", min_width=40)
-
-                # Group by device type
-                device_types = {}
-                for device in cube_devices_copy.values():
-                    if device.device_type not in device_types:
-                        device_types[device.device_type] = []
-                    device_types[device.device_type].append(device)
-
-                for device_type, type_devices in device_types.items():
-                    for i, device in enumerate(type_devices):
-                        device_name = (
-                            f"{device.port} ({device.name})" if device.name else device.port
-                        )
-                        progress_bar = self._create_progress_bar(device.progress, device.status)
-
-                        if device.error_msg:
-                            device_name += f" [red]({device.error_msg})[/red]"
-
-                        table.add_row(device_name, progress_bar)
-
-                progress_panel = Panel(
-                    table,
-                    title="[bold yellow]Cube Firmware Update Progress[/bold yellow]",
-                )
-
-            # Clear screen and move cursor to top
-            self.console.clear()
-
-            # Print console output section if we have any
-            if console_lines:
-                console_text = "\n".join(console_lines)
-                console_panel = Panel(console_text, title="[bold blue]Console Output[/bold blue]")
-                self.console.print(console_panel)
-                self.console.print()
-
-            # Print progress section
-            self.console.print(progress_panel)
-
-        except Exception:
-            # If rendering fails, just skip this update
-            pass
-
-
-    def update_dronecan_status(self):
-        """Refresh the unified status display"""
-        # Manual refresh for unified progress display
-        self._refresh_display()
+            return _BAR_QUEUED
 
     def print_final_summary(self):
         """Print final summary of all operations"""
@@ -53,10 +53,12 @@
 # AP_FLAKE8_CLEAN
 
 import argparse
-import array
-import base64
 import binascii
+import fnmatch
+import functools
+import glob
 import json
+import mmap
 import os
 import platform
 import re
@@ -64,6 +66,7 @@ import struct
 import sys
 import time
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 from sys import platform as _platform
 
 import serial
@@ -95,9 +98,55 @@ default_ports = [
 if "cygwin" in _platform or is_WSL:
     default_ports += ["/dev/ttyS*"]
 
-if "win32" in _platform:
-    for com_port in range(1, 255):
-        default_ports += ["COM" + str(com_port)]
+# ports are glob patterns on POSIX-like platforms, plain names elsewhere
+_GLOB_PORTS = "linux" in _platform or "darwin" in _platform or "cygwin" in _platform
+
+# platform filter applied by ports_to_try(), picked once at import
+if "cygwin" in _platform:
+    # Cygwin, don't open MAC OS and Win ports, we are more like
+    # Linux. Cygwin needs to be before Windows test
+    _port_filter = None
+elif "darwin" in _platform:
+
+    def _port_filter(port):
+        # OS X, don't open Windows and Linux ports
+        return "COM" not in port and "ACM" not in port
+
+elif "win" in _platform:
+
+    def _port_filter(port):
+        # Windows, don't open POSIX ports
+        return "/" not in port
+
+else:
+    _port_filter = None
+
+def _default_port_patterns():
+    """default_ports, plus every COM port on Windows (built only when scanning)"""
+    if "win32" in _platform:
+        return default_ports + ["COM%u" % com_port for com_port in range(1, 255)]
+    return default_ports
+
+
+def _expand_port_patterns(patterns):
+    """glob each pattern in order, listing every directory only once"""
+    listings = {}
+    portlist = []
+    for pattern in patterns:
+        dirname, basename = os.path.split(pattern)
+        if glob.has_magic(dirname):
+            portlist += sorted(glob.glob(pattern))
+            continue
+        if dirname not in listings:
+            try:
+                listings[dirname] = os.listdir(dirname or ".")
+            except OSError:
+                listings[dirname] = []
+        names = fnmatch.filter(listings[dirname], basename)
+        portlist += sorted(os.path.join(dirname, name) for name in names)
+    # several patterns can match the same device, keep its first (highest priority) place
+    return list(dict.fromkeys(portlist))
+
 
 # Detect python version
 if sys.version_info[0] < 3:
@@ -109,286 +158,99 @@ else:
 # designating firmware builds compatible with multiple boardIDs
 compatible_IDs = {33: (9, "AUAVX2.1")}
 
-
-# CRC equivalent to crc_crc32() in AP_Math/crc.cpp
-crctab = array.array(
-    "I",
-    [
-        0x00000000,
-        0x77073096,
-        0xEE0E612C,
-        0x990951BA,
-        0x076DC419,
-        0x706AF48F,
-        0xE963A535,
-        0x9E6495A3,
-        0x0EDB8832,
-        0x79DCB8A4,
-        0xE0D5E91E,
-        0x97D2D988,
-        0x09B64C2B,
-        0x7EB17CBD,
-        0xE7B82D07,
-        0x90BF1D91,
-        0x1DB71064,
-        0x6AB020F2,
-        0xF3B97148,
-        0x84BE41DE,
-        0x1ADAD47D,
-        0x6DDDE4EB,
-        0xF4D4B551,
-        0x83D385C7,
-        0x136C9856,
-        0x646BA8C0,
-        0xFD62F97A,
-        0x8A65C9EC,
-        0x14015C4F,
-        0x63066CD9,
-        0xFA0F3D63,
-        0x8D080DF5,
-        0x3B6E20C8,
-        0x4C69105E,
-        0xD56041E4,
-        0xA2677172,
-        0x3C03E4D1,
-        0x4B04D447,
-        0xD20D85FD,
-        0xA50AB56B,
-        0x35B5A8FA,
-        0x42B2986C,
-        0xDBBBC9D6,
-        0xACBCF940,
-        0x32D86CE3,
-        0x45DF5C75,
-        0xDCD60DCF,
-        0xABD13D59,
-        0x26D930AC,
-        0x51DE003A,
-        0xC8D75180,
-        0xBFD06116,
-        0x21B4F4B5,
-        0x56B3C423,
-        0xCFBA9599,
-        0xB8BDA50F,
-        0x2802B89E,
-        0x5F058808,
-        0xC60CD9B2,
-        0xB10BE924,
-        0x2F6F7C87,
-        0x58684C11,
-        0xC1611DAB,
-        0xB6662D3D,
-        0x76DC4190,
-        0x01DB7106,
-        0x98D220BC,
-        0xEFD5102A,
-        0x71B18589,
-        0x06B6B51F,
-        0x9FBFE4A5,
-        0xE8B8D433,
-        0x7807C9A2,
-        0x0F00F934,
-        0x9609A88E,
-        0xE10E9818,
-        0x7F6A0DBB,
-        0x086D3D2D,
-        0x91646C97,
-        0xE6635C01,
-        0x6B6B51F4,
-        0x1C6C6162,
-        0x856530D8,
-        0xF262004E,
-        0x6C0695ED,
-        0x1B01A57B,
-        0x8208F4C1,
-        0xF50FC457,
-        0x65B0D9C6,
-        0x12B7E950,
-        0x8BBEB8EA,
-        0xFCB9887C,
-        0x62DD1DDF,
-        0x15DA2D49,
-        0x8CD37CF3,
-        0xFBD44C65,
-        0x4DB26158,
-        0x3AB551CE,
-        0xA3BC0074,
-        0xD4BB30E2,
-        0x4ADFA541,
-        0x3DD895D7,
-        0xA4D1C46D,
-        0xD3D6F4FB,
-        0x4369E96A,
-        0x346ED9FC,
-        0xAD678846,
-        0xDA60B8D0,
-        0x44042D73,
-        0x33031DE5,
-        0xAA0A4C5F,
-        0xDD0D7CC9,
-        0x5005713C,
-        0x270241AA,
-        0xBE0B1010,
-        0xC90C2086,
-        0x5768B525,
-        0x206F85B3,
-        0xB966D409,
-        0xCE61E49F,
-        0x5EDEF90E,
-        0x29D9C998,
-        0xB0D09822,
-        0xC7D7A8B4,
-        0x59B33D17,
-        0x2EB40D81,
-        0xB7BD5C3B,
-        0xC0BA6CAD,
-        0xEDB88320,
-        0x9ABFB3B6,
-        0x03B6E20C,
-        0x74B1D29A,
-        0xEAD54739,
-        0x9DD277AF,
-        0x04DB2615,
-        0x73DC1683,
-        0xE3630B12,
-        0x94643B84,
-        0x0D6D6A3E,
-        0x7A6A5AA8,
-        0xE40ECF0B,
-        0x9309FF9D,
-        0x0A00AE27,
-        0x7D079EB1,
-        0xF00F9344,
-        0x8708A3D2,
-        0x1E01F268,
-        0x6906C2FE,
-        0xF762575D,
-        0x806567CB,
-        0x196C3671,
-        0x6E6B06E7,
-        0xFED41B76,
-        0x89D32BE0,
-        0x10DA7A5A,
-        0x67DD4ACC,
-        0xF9B9DF6F,
-        0x8EBEEFF9,
-        0x17B7BE43,
-        0x60B08ED5,
-        0xD6D6A3E8,
-        0xA1D1937E,
-        0x38D8C2C4,
-        0x4FDFF252,
-        0xD1BB67F1,
-        0xA6BC5767,
-        0x3FB506DD,
-        0x48B2364B,
-        0xD80D2BDA,
-        0xAF0A1B4C,
-        0x36034AF6,
-        0x41047A60,
-        0xDF60EFC3,
-        0xA867DF55,
-        0x316E8EEF,
-        0x4669BE79,
-        0xCB61B38C,
-        0xBC66831A,
-        0x256FD2A0,
-        0x5268E236,
-        0xCC0C7795,
-        0xBB0B4703,
-        0x220216B9,
-        0x5505262F,
-        0xC5BA3BBE,
-        0xB2BD0B28,
-        0x2BB45A92,
-        0x5CB36A04,
-        0xC2D7FFA7,
-        0xB5D0CF31,
-        0x2CD99E8B,
-        0x5BDEAE1D,
-        0x9B64C2B0,
-        0xEC63F226,
-        0x756AA39C,
-        0x026D930A,
-        0x9C0906A9,
-        0xEB0E363F,
-        0x72076785,
-        0x05005713,
-        0x95BF4A82,
-        0xE2B87A14,
-        0x7BB12BAE,
-        0x0CB61B38,
-        0x92D28E9B,
-        0xE5D5BE0D,
-        0x7CDCEFB7,
-        0x0BDBDF21,
-        0x86D3D2D4,
-        0xF1D4E242,
-        0x68DDB3F8,
-        0x1FDA836E,
-        0x81BE16CD,
-        0xF6B9265B,
-        0x6FB077E1,
-        0x18B74777,
-        0x88085AE6,
-        0xFF0F6A70,
-        0x66063BCA,
-        0x11010B5C,
-        0x8F659EFF,
-        0xF862AE69,
-        0x616BFFD3,
-        0x166CCF45,
-        0xA00AE278,
-        0xD70DD2EE,
-        0x4E048354,
-        0x3903B3C2,
-        0xA7672661,
-        0xD06016F7,
-        0x4969474D,
-        0x3E6E77DB,
-        0xAED16A4A,
-        0xD9D65ADC,
-        0x40DF0B66,
-        0x37D83BF0,
-        0xA9BCAE53,
-        0xDEBB9EC5,
-        0x47B2CF7F,
-        0x30B5FFE9,
-        0xBDBDF21C,
-        0xCABAC28A,
-        0x53B39330,
-        0x24B4A3A6,
-        0xBAD03605,
-        0xCDD70693,
-        0x54DE5729,
-        0x23D967BF,
-        0xB3667A2E,
-        0xC4614AB8,
-        0x5D681B02,
-        0x2A6F2B94,
-        0xB40BBE37,
-        0xC30C8EA1,
-        0x5A05DF1B,
-        0x2D02EF8D,
-    ],
+# ArduPilot's board definitions, when uploader.py sits in its Tools/scripts directory.
+# uploader.py is swiped into other places, so if the dir doesn't exist then fail silently
+_HWDEF_DIR = os.path.normpath(
+    os.path.join(
+        os.path.dirname(os.path.realpath(__file__)),
+        "..",
+        "..",
+        "libraries",
+        "AP_HAL_ChibiOS",
+        "hwdef",
+    )
 )
-
-
+_HWDEF_DIR_PRESENT = os.path.exists(_HWDEF_DIR)
+# board IDs used by several hwdef directories, named after the board they started with
+_SHARED_BOARD_IDS = {
+    9: "fmuv3",
+    50: "fmuv5",
+    140: "CubeOrange",
+    1063: "CubeOrangePlus",
+}
+
+# hwdef subdirectories that aren't boards
+_HWDEF_SKIP_DIRS = frozenset(["scripts", "common", "STM32CubeConf"])
+
+# STM32 families reported by GET_CHIP, by DBGMCU_IDCODE device ID
+_F4_IDS = {
+    0x413: "STM32F40x_41x",
+    0x419: "STM32F42x_43x",
+    0x421: "STM32F42x_446xx",
+}
+_F7_IDS = {
+    0x449: "STM32F74x_75x",
+    0x451: "STM32F76x_77x",
+}
+_H7_IDS = {
+    0x450: "STM32H74x_75x",
+}
+
+# STM32F4 silicon revisions: (label, affected by the 1M flash errata)
+_F4_REVS = {
+    0x1000: ("A", True),
+    0x1001: ("Z", True),
+    0x1003: ("Y", True),
+    0x1007: ("1", True),
+    0x2001: ("3", False),
+}
+
+# family -> (mcu name, revision table or None)
+_MCU_FAMILIES = {
+    **{family: (mcu, _F4_REVS) for family, mcu in _F4_IDS.items()},
+    **{family: (mcu, None) for family, mcu in _F7_IDS.items()},
+    **{family: (mcu, None) for family, mcu in _H7_IDS.items()},
+}
+
+# the APJ_BOARD_ID line of a hwdef.dat, matched over the whole file
+_APJ_BOARD_ID_RE = re.compile(rb"^[ \t]*APJ_BOARD_ID[ \t]+(\d+)[ \t\r]*$", re.MULTILINE)
+
+
+# CRC equivalent to crc_crc32() in AP_Math/crc.cpp. That is the IEEE CRC-32
+# without the pre- and post-inversion, so zlib's is wrapped with both XORs
 def crc32(bytes, state=0):
     """crc32 exposed for use by chibios.py"""
-    for byte in bytes:
-        index = (state ^ byte) & 0xFF
-        state = crctab[index] ^ (state >> 8)
-    return state
+    return zlib.crc32(bytes, state ^ 0xFFFFFFFF) ^ 0xFFFFFFFF
+
+
+# make sure the wrapping above matches the AP_Math table implementation
+assert crc32(b"123456789") == 0x2DFD2D88
+
+# erased flash, used to pad the image CRC out to the flash size
+_crc_pad_block = memoryview(b"\xff" * 65536)
+
+
+# anything a2b_base64 would skip over, such as whitespace of any kind
+_BASE64_SKIPPED_RE = re.compile(r"[^A-Za-z0-9+/=]")
+
+
+def _decode_image(encoded):
+    """decode a base64 zlib-compressed image straight into a bytearray"""
+    # slices must stay aligned to 4 base64 characters, so drop skipped characters first
+    if _BASE64_SKIPPED_RE.search(encoded):
+        encoded = _BASE64_SKIPPED_RE.sub("", encoded)
+    decompressor = zlib.decompressobj()
+    image = bytearray()
+    # 64 KiB of base64 text at a time, never holding the whole compressed image
+    for i in range(0, len(encoded), 65536):
+        image += decompressor.decompress(binascii.a2b_base64(encoded[i : i + 65536]))
+    image += decompressor.flush()
+    return image
 
 
 class firmware(object):
     """Loads a firmware file"""
 
-    desc = {}
-    image = bytes()
-    crcpad = bytearray(b"\xff\xff\xff\xff")
-
     def __init__(self, path):
 
         # read the file
@@ -396,35 +258,80 @@ class firmware(object):
         self.desc = json.load(f)
         f.close()
 
-        self.image = bytearray(zlib.decompress(base64.b64decode(self.desc["image"])))
+        self.image = _decode_image(self.desc["image"])
         if "extf_image" in self.desc:
-            self.extf_image = bytearray(zlib.decompress(base64.b64decode(self.desc["extf_image"])))
+            self.extf_image = _decode_image(self.desc["extf_image"])
         else:
             self.extf_image = None
-        # pad image to 4-byte length
-        while (len(self.image) % 4) != 0:
-            self.image += bytes(0xFF)
+        # pad image to 4-byte length with erased-flash bytes
+        self.image.extend(b"\xff" * (-len(self.image) & 3))
         # pad image to 4-byte length
         if self.extf_image is not None:
-            while (len(self.extf_image) % 4) != 0:
-                self.extf_image += bytes(0xFF)
+            self.extf_image.extend(b"\xff" * (-len(self.extf_image) & 3))
 
     def property(self, propname, default=None):
-        if propname in self.desc:
-            return self.desc[propname]
-        return default
+        return self.desc.get(propname, default)
 
     def extf_crc(self, size):
-        state = crc32(self.extf_image[:size], int(0))
+        # memoryview slicing avoids copying up to the whole external image
+        state = crc32(memoryview(self.extf_image)[:size], int(0))
         return state
 
     def crc(self, padlen):
         state = crc32(self.image, int(0))
-        for i in range(len(self.image), (padlen - 1), 4):
-            state = crc32(self.crcpad, state)
+        # the rest of flash up to padlen is erased (0xFF), CRC it a block at a time
+        remaining = len(range(len(self.image), (padlen - 1), 4)) * 4
+        while remaining > 0:
+            n = min(remaining, len(_crc_pad_block))
+            state = crc32(_crc_pad_block[:n], state)
+            remaining -= n
         return state
 
 
+@functools.lru_cache(maxsize=None)
+def _hwdef_index():
+    """map each APJ_BOARD_ID to the hwdef directories using it. The hwdef tree doesn't
+    change while we run, so it is scanned once on first use"""
+    index = {}
+    if _HWDEF_DIR_PRESENT:
+        # scandir entries carry the file type, so is_dir() needs no extra stat
+        with os.scandir(_HWDEF_DIR) as entries:
+            for entry in entries:
+                if entry.name in _HWDEF_SKIP_DIRS or not entry.is_dir():
+                    continue
+                filepath = os.path.join(entry.path, "hwdef.dat")
+                try:
+                    # search the mapped file in place, a board only has one APJ_BOARD_ID
+                    with open(filepath, "rb") as fh, mmap.mmap(
+                        fh.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as data:
+                        m = _APJ_BOARD_ID_RE.search(data)
+                        if m is None:
+                            continue
+                        board_id = int(m.group(1))
+                except FileNotFoundError:
+                    continue
+                except ValueError:
+                    # empty hwdef.dat, which can't be mapped
+                    continue
+                index.setdefault(board_id, []).append(entry.name)
+    return index
+
+
+@functools.lru_cache(maxsize=None)
+def _board_names():
+    """board_id -> name for every known board, the shared IDs take precedence over
+    the hwdef directories that reuse them"""
+    names = {board_id: " or ".join(dirs) for board_id, dirs in _hwdef_index().items()}
+    names.update(_SHARED_BOARD_IDS)
+    return names
+
+
+def _board_name_for_board_id(board_id):
+    """return name for board_id, None if it can't be found"""
+    return _board_names().get(board_id)
+
+
 class uploader(object):
     """Uploads a firmware file to the PX FMU bootloader"""
 
@@ -479,6 +386,11 @@ class uploader(object):
     NSH_REBOOT_BL = b"reboot -b\n"
     NSH_REBOOT = b"reboot\n"
 
+    # MAVLink COMMAND_LONG reboot-to-bootloader for component 1 and 0, used unless a
+    # target_system is given
+    MAVLINK_REBOOT_ID1 = b"\xfe\x21\x72\xff\x00\x4c\x00\x00\x40\x40\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xf6\x00\x01\x00\x00\x53\x6b"  # NOQA
+    MAVLINK_REBOOT_ID0 = b"\xfe\x21\x45\xff\x00\x4c\x00\x00\x40\x40\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xf6\x00\x00\x00\x00\xcc\x37"  # NOQA
+
     def __init__(
         self,
         portname,
@@ -493,13 +405,8 @@ class uploader(object):
         force_erase=False,
         progress_callback=None,
         log_callback=None,
+        pipeline_depth=1,
     ):
-        self.MAVLINK_REBOOT_ID1 = bytearray(
-            b"\xfe\x21\x72\xff\x00\x4c\x00\x00\x40\x40\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xf6\x00\x01\x00\x00\x53\x6b"
-        )  # NOQA
-        self.MAVLINK_REBOOT_ID0 = bytearray(
-            b"\xfe\x21\x45\xff\x00\x4c\x00\x00\x40\x40\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\xf6\x00\x00\x00\x00\xcc\x37"
-        )  # NOQA
         if target_component is None:
             target_component = 1
         if source_system is None:
@@ -510,9 +417,21 @@ class uploader(object):
         self.force_erase = force_erase
         self.progress_callback = progress_callback
         self.log_callback = log_callback
-
-        # open the port, keep the default timeout short so we can poll quickly
-        self.port = serial.Serial(portname, baudrate_bootloader, timeout=2.0, write_timeout=2.0)
+        # number of PROG_MULTI commands allowed in flight before waiting for a reply,
+        # 1 keeps the classic lock-step send/ack behaviour
+        self.pipeline_depth = max(1, pipeline_depth)
+        # (label, whole percent, suffix) last drawn by __drawProgressBar
+        self.__last_progress = None
+        # reused for every *_MULTI command: cmd + length + payload + EOC
+        self.__multi_buf = bytearray(uploader.PROG_MULTI_MAX + 3)
+
+        # open the port, keep the default timeout short so we can poll quickly.
+        # Exclusive so parallel batch uploads can never share a device (flock on POSIX,
+        # Windows COM ports are always exclusive)
+        self.port = serial.Serial(
+            portname, baudrate_bootloader, timeout=2.0, write_timeout=2.0, exclusive=True
+        )
+        self.__set_buffer_size()
         self.baudrate_bootloader = baudrate_bootloader
         if baudrate_bootloader_flash is not None:
             self.baudrate_bootloader_flash = baudrate_bootloader_flash
@@ -561,6 +480,7 @@ class uploader(object):
             if not portopen and time.time() < timeout:
                 try:
                     self.port.open()
+                    self.__set_buffer_size()
                 except OSError:
                     # wait for the port to be ready
                     time.sleep(0.04)
@@ -571,6 +491,12 @@ class uploader(object):
             else:
                 break
 
+    # the Windows driver defaults to small queues, make room for whole READ_MULTI replies
+    # and pipelined PROG_MULTI windows. POSIX reads already drain the tty in one os.read()
+    def __set_buffer_size(self):
+        if "win32" in _platform:
+            self.port.set_buffer_size(rx_size=65536, tx_size=65536)
+
     def __send(self, c):
         self.port.write(c)
 
@@ -583,13 +509,12 @@ class uploader(object):
 
     def __recv_int(self):
         raw = self.__recv(4)
-        val = struct.unpack("<I", raw)
-        return val[0]
+        if len(raw) != 4:
+            raise RuntimeError("short read waiting for data (%u of 4 bytes)" % len(raw))
+        return int.from_bytes(raw, "little")
 
     def __recv_uint8(self):
-        raw = self.__recv(1)
-        val = struct.unpack("<B", raw)
-        return val[0]
+        return self.__recv(1)[0]
 
     def __getSync(self):
         self.port.flush()
@@ -643,13 +568,20 @@ class uploader(object):
         self.__getSync()
         return value
 
-    # send the GET_OTP command and wait for an info parameter
-    def __getOTP(self, param):
-        t = struct.pack("I", param)  # int param as 32bit ( 4 byte ) char array.
-        self.__send(uploader.GET_OTP + t + uploader.EOC)
-        value = self.__recv(4)
-        self.__getSync()
-        return value
+    # send GET_OTP commands for a range of offsets and return the concatenated words,
+    # up to pipeline_depth requests are written at once before their replies are read
+    def __getOTPs(self, offsets):
+        value = bytearray()
+        for i in range(0, len(offsets), self.pipeline_depth):
+            batch = offsets[i : i + self.pipeline_depth]
+            # int param as 32bit ( 4 byte ) char array.
+            self.__send(
+                b"".join(uploader.GET_OTP + struct.pack("I", param) + uploader.EOC for param in batch)
+            )
+            for _ in batch:
+                value += self.__recv(4)
+                self.__getSync()
+        return bytes(value)
 
     # send the GET_SN command and wait for an info parameter
     def __getSN(self, param):
@@ -687,12 +619,26 @@ class uploader(object):
         else:
             print(message)
 
-    def __drawProgressBar(self, label, progress, maxVal):
+    def __log_lines(self, lines):
+        """Log several messages, as a single stdout write when there is no callback"""
+        if self.log_callback:
+            for line in lines:
+                self.__log(line)
+        elif lines:
+            sys.stdout.write("\n".join(lines) + "\n")
+
+    def __drawProgressBar(self, label, progress, maxVal, suffix=""):
         if maxVal < progress:
             progress = maxVal
 
         percent = (float(progress) / float(maxVal)) * 100.0
 
+        # Nothing visible changes below a whole percent, skip the redraw and callback
+        key = (label, int(percent), suffix)
+        if key == self.__last_progress:
+            return
+        self.__last_progress = key
+
         # Call progress callback if provided
         if self.progress_callback:
             phase = "unknown"
@@ -710,7 +656,7 @@ class uploader(object):
 
         # Only show progress bar on stdout if no callbacks are provided
         if not self.progress_callback and not self.log_callback:
-            sys.stdout.write("\r%s: [%-20s] %.1f%%" % (label, "=" * int(percent / 5.0), percent))
+            sys.stdout.write("\r%s: [%-20s] %.1f%%%s" % (label, "=" * int(percent / 5.0), percent, suffix))
             sys.stdout.flush()
 
     # send the CHIP_ERASE command and wait for the bootloader to become ready
@@ -733,9 +679,9 @@ class uploader(object):
             if estimatedTimeRemaining >= 9.0:
                 self.__drawProgressBar(label, timeout - estimatedTimeRemaining, 9.0)
             else:
-                self.__drawProgressBar(label, 10.0, 10.0)
-                sys.stdout.write(" (timeout: %d seconds) " % int(deadline - time.time()))
-                sys.stdout.flush()
+                self.__drawProgressBar(
+                    label, 10.0, 10.0, " (timeout: %d seconds) " % int(deadline - time.time())
+                )
 
             if self.__trySync():
                 self.__drawProgressBar(label, 10.0, 10.0)
@@ -743,65 +689,40 @@ class uploader(object):
 
         raise RuntimeError("timed out waiting for erase")
 
-    # send a PROG_MULTI command to write a collection of bytes
+    # send a command, its one byte length, an optional payload and EOC as a single write
+    def __send_multi(self, cmd, length, data=b""):
+        buf = self.__multi_buf
+        n = len(data)
+        buf[0:1] = cmd
+        buf[1] = length
+        buf[2 : 2 + n] = data
+        buf[2 + n : 3 + n] = uploader.EOC
+        self.__send(memoryview(buf)[: 3 + n])
+
+    # send a PROG_MULTI command to write a collection of bytes, the caller collects the reply
     def __program_multi(self, data):
+        self.__send_multi(uploader.PROG_MULTI, len(data), data)
 
-        if runningPython3:
-            length = len(data).to_bytes(1, byteorder="big")
-        else:
-            length = chr(len(data))
-
-        self.__send(uploader.PROG_MULTI)
-        self.__send(length)
-        self.__send(data)
-        self.__send(uploader.EOC)
-        self.__getSync()
-
-    # send a PROG_EXTF_MULTI command to write a collection of bytes to external flash
+    # send a PROG_EXTF_MULTI command to write a collection of bytes to external flash,
+    # the caller collects the reply
     def __program_multi_extf(self, data):
-
-        if runningPython3:
-            length = len(data).to_bytes(1, byteorder="big")
-        else:
-            length = chr(len(data))
-
-        self.__send(uploader.EXTF_PROG_MULTI)
-        self.__send(length)
-        self.__send(data)
-        self.__send(uploader.EOC)
-        self.__getSync()
+        self.__send_multi(uploader.EXTF_PROG_MULTI, len(data), data)
 
     # verify multiple bytes in flash
     def __verify_multi(self, data):
-
-        if runningPython3:
-            length = len(data).to_bytes(1, byteorder="big")
-        else:
-            length = chr(len(data))
-
-        self.__send(uploader.READ_MULTI)
-        self.__send(length)
-        self.__send(uploader.EOC)
+        self.__send_multi(uploader.READ_MULTI, len(data))
         self.port.flush()
         programmed = self.__recv(len(data))
         if programmed != data:
-            self.__log("got    " + binascii.hexlify(programmed).decode('ascii'))
-            self.__log("expect " + binascii.hexlify(data).decode('ascii'))
+            self.__log("got    " + programmed.hex())
+            self.__log("expect " + data.hex())
             return False
         self.__getSync()
         return True
 
     # read multiple bytes from flash
     def __read_multi(self, length):
-
-        if runningPython3:
-            clength = length.to_bytes(1, byteorder="big")
-        else:
-            clength = chr(length)
-
-        self.__send(uploader.READ_MULTI)
-        self.__send(clength)
-        self.__send(uploader.EOC)
+        self.__send_multi(uploader.READ_MULTI, length)
         self.port.flush()
         ret = self.__recv(length)
         self.__getSync()
@@ -816,25 +737,44 @@ class uploader(object):
         if self.bl_rev >= 3:
             self.__getSync()
 
-    # split a sequence into a list of size-constrained pieces
+    # split a sequence into size-constrained zero-copy views, returns (count, generator)
     def __split_len(self, seq, length):
-        return [seq[i : i + length] for i in range(0, len(seq), length)]
+        view = memoryview(seq)
+        count = (len(view) + length - 1) // length
+        return count, (view[i : i + length] for i in range(0, len(view), length))
 
     # upload code
     def __program(self, label, fw):
         if not self.log_callback:
             print("\n", end="")
         code = fw.image
-        groups = self.__split_len(code, uploader.PROG_MULTI_MAX)
+        group_count, groups = self.__split_len(code, uploader.PROG_MULTI_MAX)
+
+        # bind the per-chunk calls once, outside the loop
+        program_multi = self.__program_multi
+        get_sync = self.__getSync
+        depth = self.pipeline_depth
 
         uploadProgress = 0
+        pending = 0
+        next_tick = 256
         for bytes in groups:
-            self.__program_multi(bytes)
+            program_multi(bytes)
+
+            # keep up to pipeline_depth commands in flight, then wait for the oldest reply
+            pending += 1
+            if pending >= depth:
+                get_sync()
+                pending -= 1
 
             # Print upload progress (throttled, so it does not delay upload progress)
             uploadProgress += 1
-            if uploadProgress % 256 == 0:
-                self.__drawProgressBar(label, uploadProgress, len(groups))
+            next_tick -= 1
+            if not next_tick:
+                next_tick = 256
+                self.__drawProgressBar(label, uploadProgress, group_count)
+        for _ in range(pending):
+            get_sync()
         self.__drawProgressBar(label, 100, 100)
 
     # download code
@@ -843,19 +783,25 @@ class uploader(object):
             print("\n", end="")
         f = open(fw, "wb")
 
-        downloadProgress = 0
+        # bind the per-chunk calls once, outside the loop
+        read_multi = self.__read_multi
+        write = f.write
+        fw_maxsize = self.fw_maxsize
+
+        next_tick = 256
         readsize = uploader.READ_MULTI_MAX
         total = 0
         while True:
-            n = min(self.fw_maxsize - total, readsize)
-            bb = self.__read_multi(n)
-            f.write(bb)
+            n = min(fw_maxsize - total, readsize)
+            bb = read_multi(n)
+            write(bb)
 
             total += len(bb)
             # Print download progress (throttled, so it does not delay download progress)
-            downloadProgress += 1
-            if downloadProgress % 256 == 0:
-                self.__drawProgressBar(label, total, self.fw_maxsize)
+            next_tick -= 1
+            if not next_tick:
+                next_tick = 256
+                self.__drawProgressBar(label, total, fw_maxsize)
             if len(bb) < readsize:
                 break
         f.close()
@@ -869,13 +815,19 @@ class uploader(object):
         self.__send(uploader.CHIP_VERIFY + uploader.EOC)
         self.__getSync()
         code = fw.image
-        groups = self.__split_len(code, uploader.READ_MULTI_MAX)
+        group_count, groups = self.__split_len(code, uploader.READ_MULTI_MAX)
+        # bind the per-chunk call once, outside the loop
+        verify_multi = self.__verify_multi
+
         verifyProgress = 0
+        next_tick = 256
         for bytes in groups:
             verifyProgress += 1
-            if verifyProgress % 256 == 0:
-                self.__drawProgressBar(label, verifyProgress, len(groups))
-            if not self.__verify_multi(bytes):
+            next_tick -= 1
+            if not next_tick:
+                next_tick = 256
+                self.__drawProgressBar(label, verifyProgress, group_count)
+            if not verify_multi(bytes):
                 raise RuntimeError("Verification failed")
         self.__drawProgressBar(label, 100, 100)
 
@@ -923,16 +875,33 @@ class uploader(object):
         if not self.log_callback:
             print("\n", end="")
         code = fw.extf_image
-        groups = self.__split_len(code, uploader.PROG_MULTI_MAX)
+        group_count, groups = self.__split_len(code, uploader.PROG_MULTI_MAX)
+
+        # bind the per-chunk calls once, outside the loop
+        program_multi = self.__program_multi_extf
+        get_sync = self.__getSync
+        depth = self.pipeline_depth
 
         uploadProgress = 0
+        pending = 0
+        next_tick = 32
         for bytes in groups:
-            self.__program_multi_extf(bytes)
+            program_multi(bytes)
+
+            # keep up to pipeline_depth commands in flight, then wait for the oldest reply
+            pending += 1
+            if pending >= depth:
+                get_sync()
+                pending -= 1
 
             # Print upload progress (throttled, so it does not delay upload progress)
             uploadProgress += 1
-            if uploadProgress % 32 == 0:
-                self.__drawProgressBar(label, uploadProgress, len(groups))
+            next_tick -= 1
+            if not next_tick:
+                next_tick = 32
+                self.__drawProgressBar(label, uploadProgress, group_count)
+        for _ in range(pending):
+            get_sync()
         self.__drawProgressBar(label, 100, 100)
 
     def __verify_extf(self, label, fw, size):
@@ -956,9 +925,9 @@ class uploader(object):
             if estimatedTimeRemaining >= 4.0:
                 self.__drawProgressBar(label, 10.0 - estimatedTimeRemaining, 4.0)
             else:
-                self.__drawProgressBar(label, 5.0, 5.0)
-                sys.stdout.write(" (timeout: %d seconds) " % int(deadline - time.time()))
-                sys.stdout.flush()
+                self.__drawProgressBar(
+                    label, 5.0, 5.0, " (timeout: %d seconds) " % int(deadline - time.time())
+                )
 
             try:
                 report_crc = self.__recv_int()
@@ -1002,14 +971,19 @@ class uploader(object):
         self.fw_maxsize = self.__getInfo(uploader.INFO_FLASH_SIZE)
 
     def dump_board_info(self):
+        # collect the whole report first so it is written out in one go
+        out = []
+        try:
+            self.__board_info(out)
+        finally:
+            self.__log_lines(out)
+
+    # build the board info report, one line per entry in out
+    def __board_info(self, out):
         # OTP added in v4:
-        self.__log("Bootloader Protocol: %u" % self.bl_rev)
+        out.append("Bootloader Protocol: %u" % self.bl_rev)
         if self.bl_rev > 3:
-            otp = b""
-            for byte in range(0, 32 * 6, 4):
-                x = self.__getOTP(byte)
-                otp = otp + x
-            #                print(binascii.hexlify(x).decode('Latin-1') + ' ', end='')
+            otp = self.__getOTPs(range(0, 32 * 6, 4))
             # see src/modules/systemlib/otp.h in px4 code:
             otp_id = otp[0:4]
             otp_idtype = otp[4:5]
@@ -1018,18 +992,15 @@ class uploader(object):
             otp_coa = otp[32:160]
             # show user:
             try:
-                self.__log("OTP:")
-                self.__log("  type: " + otp_id.decode("Latin-1"))
-                self.__log("  idtype: " + binascii.b2a_qp(otp_idtype).decode("Latin-1"))
-                self.__log("  vid: " + binascii.hexlify(otp_vid).decode("Latin-1"))
-                self.__log("  pid: " + binascii.hexlify(otp_pid).decode("Latin-1"))
-                self.__log("  coa: " + binascii.b2a_base64(otp_coa).decode("Latin-1").strip())
-                sn_parts = []
-                for byte in range(0, 12, 4):
-                    x = self.__getSN(byte)
-                    x = x[::-1]  # reverse the bytes
-                    sn_parts.append(binascii.hexlify(x).decode("Latin-1"))
-                self.__log("  sn: " + "".join(sn_parts))
+                out.append("OTP:")
+                out.append("  type: " + otp_id.decode("Latin-1"))
+                out.append("  idtype: " + binascii.b2a_qp(otp_idtype).decode("Latin-1"))
+                out.append("  vid: " + otp_vid.hex())
+                out.append("  pid: " + otp_pid.hex())
+                out.append("  coa: " + binascii.b2a_base64(otp_coa).decode("Latin-1").strip())
+                sn = b"".join(self.__getSN(byte) for byte in range(0, 12, 4))
+                # the SN words are little-endian, show each most significant byte first
+                out.append("  sn: " + "".join("%08x" % word for word in struct.unpack("<3I", sn)))
             except Exception:
                 # ignore bad character encodings
                 pass
@@ -1037,149 +1008,70 @@ class uploader(object):
         if self.bl_rev >= 5:
             des = self.__getCHIPDes()
             if len(des) == 2:
-                self.__log("ChipDes:")
-                self.__log("  family: %s" % des[0])
-                self.__log("  revision: %s" % des[1])
-        self.__log("Chip:")
+                out.append("ChipDes:")
+                out.append("  family: %s" % des[0])
+                out.append("  revision: %s" % des[1])
+        out.append("Chip:")
         if self.bl_rev > 4:
             chip = self.__getCHIP()
-            mcu_id = chip & 0xFFF
-            revs = {}
-
-            F4_IDS = {
-                0x413: "STM32F40x_41x",
-                0x419: "STM32F42x_43x",
-                0x421: "STM32F42x_446xx",
-            }
-            F7_IDS = {
-                0x449: "STM32F74x_75x",
-                0x451: "STM32F76x_77x",
-            }
-            H7_IDS = {
-                0x450: "STM32H74x_75x",
-            }
-
-            family = mcu_id & 0xFFF
-
-            if family in F4_IDS:
-                mcu = F4_IDS[family]
-                MCU_REV_STM32F4_REV_A = 0x1000
-                MCU_REV_STM32F4_REV_Z = 0x1001
-                MCU_REV_STM32F4_REV_Y = 0x1003
-                MCU_REV_STM32F4_REV_1 = 0x1007
-                MCU_REV_STM32F4_REV_3 = 0x2001
-                revs = {
-                    MCU_REV_STM32F4_REV_A: ("A", True),
-                    MCU_REV_STM32F4_REV_Z: ("Z", True),
-                    MCU_REV_STM32F4_REV_Y: ("Y", True),
-                    MCU_REV_STM32F4_REV_1: ("1", True),
-                    MCU_REV_STM32F4_REV_3: ("3", False),
-                }
-                rev = (chip & 0xFFFF0000) >> 16
-
-                if rev in revs:
-                    (label, flawed) = revs[rev]
-                    if flawed and family == 0x419:
-                        self.__log(
-                            "  %x %s rev%s (flawed; 1M limit, see STM32F42XX Errata sheet sec. 2.1.10)"
-                            % (
-                                chip,
-                                mcu,
-                                label,
+            family = chip & 0xFFF
+            entry = _MCU_FAMILIES.get(family)
+            if entry is not None:
+                (mcu, revs) = entry
+                if revs is None:
+                    # F7 / H7, no known silicon revision flaws
+                    out.append("  %s %08x" % (mcu, chip))
+                else:
+                    rev = (chip & 0xFFFF0000) >> 16
+
+                    if rev in revs:
+                        (label, flawed) = revs[rev]
+                        if flawed and family == 0x419:
+                            out.append(
+                                "  %x %s rev%s (flawed; 1M limit, see STM32F42XX Errata sheet sec. 2.1.10)"
+                                % (
+                                    chip,
+                                    mcu,
+                                    label,
+                                )
                             )
-                        )
-                    elif family == 0x419:
-                        self.__log(
-                            "  %x %s rev%s (no 1M flaw)"
-                            % (
-                                chip,
-                                mcu,
-                                label,
+                        elif family == 0x419:
+                            out.append(
+                                "  %x %s rev%s (no 1M flaw)"
+                                % (
+                                    chip,
+                                    mcu,
+                                    label,
+                                )
                             )
-                        )
-                    else:
-                        self.__log(
-                            "  %x %s rev%s"
-                            % (
-                                chip,
-                                mcu,
-                                label,
+                        else:
+                            out.append(
+                                "  %x %s rev%s"
+                                % (
+                                    chip,
+                                    mcu,
+                                    label,
+                                )
                             )
-                        )
-            elif family in F7_IDS:
-                self.__log("  %s %08x" % (F7_IDS[family], chip))
-            elif family in H7_IDS:
-                self.__log("  %s %08x" % (H7_IDS[family], chip))
         else:
-            self.__log("  [unavailable; bootloader too old]")
+            out.append("  [unavailable; bootloader too old]")
 
-        self.__log("Info:")
-        self.__log("  flash size: %u" % self.fw_maxsize)
-        self.__log("  ext flash size: %u" % self.extf_maxsize)
+        out.append("Info:")
+        out.append("  flash size: %u" % self.fw_maxsize)
+        out.append("  ext flash size: %u" % self.extf_maxsize)
         name = self.board_name_for_board_id(self.board_type)
         if name is not None:
-            self.__log("  board_type: %u (%s)" % (self.board_type, name))
+            out.append("  board_type: %u (%s)" % (self.board_type, name))
         else:
-            self.__log("  board_type: %u" % self.board_type)
-        self.__log("  board_rev: %u" % self.board_rev)
+            out.append("  board_type: %u" % self.board_type)
+        out.append("  board_rev: %u" % self.board_rev)
 
-        self.__log("Identification complete")
+        out.append("Identification complete")
 
     def board_name_for_board_id(self, board_id):
         """return name for board_id, None if it can't be found"""
-        shared_ids = {
-            9: "fmuv3",
-            50: "fmuv5",
-            140: "CubeOrange",
-            1063: "CubeOrangePlus",
-        }
-        if board_id in shared_ids:
-            return shared_ids[board_id]
-
         try:
-            ret = []
-
-            hwdef_dir = os.path.join(
-                os.path.dirname(os.path.realpath(__file__)),
-                "..",
-                "..",
-                "libraries",
-                "AP_HAL_ChibiOS",
-                "hwdef",
-            )
-            # uploader.py is swiped into other places, so if the dir
-            # doesn't exist then fail silently
-            if os.path.exists(hwdef_dir):
-                dirs = [
-                    (
-                        x
-                        if (
-                            x not in ["scripts", "common", "STM32CubeConf"]
-                            and os.path.isdir(os.path.join(hwdef_dir, x))
-                        )
-                        else None
-                    )
-                    for x in os.listdir(hwdef_dir)
-                ]  # NOQA
-                for adir in dirs:
-                    if adir is None:
-                        continue
-                    filepath = os.path.join(hwdef_dir, adir, "hwdef.dat")
-                    if not os.path.exists(filepath):
-                        continue
-                    fh = open(filepath)
-                    if fh is None:
-                        continue
-                    text = fh.readlines()
-                    for line in text:
-                        m = re.match(r"^\s*APJ_BOARD_ID\s+(\d+)\s*$", line)
-                        if m is None:
-                            continue
-                        if int(m.group(1)) == board_id:
-                            ret.append(adir)
-            if len(ret) == 0:
-                return None
-            return " or ".join(ret)
+            return _board_name_for_board_id(board_id)
         except Exception as e:
             self.__log("Failed to get name: %s" % str(e))
         return None
@@ -1200,17 +1092,21 @@ class uploader(object):
 
     # upload the firmware
     def upload(self, fw, force=False, boot_delay=None):
+        board_id = fw.property("board_id")
+        image_size = fw.property("image_size")
+        extf_image_size = fw.property("extf_image_size", 0)
+
         # Make sure we are doing the right thing
-        if self.board_type != fw.property("board_id"):
+        if self.board_type != board_id:
             # ID mismatch: check compatibility
             incomp = True
             if self.board_type in compatible_IDs:
                 comp_fw_id = compatible_IDs[self.board_type][0]
                 board_name = compatible_IDs[self.board_type][1]
-                if comp_fw_id == fw.property("board_id"):
+                if comp_fw_id == board_id:
                     msg = (
                         "Target %s (board_id: %d) is compatible with firmware for board_id=%u)"
-                        % (board_name, self.board_type, fw.property("board_id"))
+                        % (board_name, self.board_type, board_id)
                     )
                     self.__log("INFO: %s" % msg)
                     incomp = False
@@ -1220,8 +1116,8 @@ class uploader(object):
                     % (
                         self.board_type,
                         self.board_name_for_board_id(self.board_type),
-                        fw.property("board_id"),
-                        self.board_name_for_board_id(fw.property("board_id")),
+                        board_id,
+                        self.board_name_for_board_id(board_id),
                     )
                 )
                 self.__log("WARNING: %s" % msg)
@@ -1233,9 +1129,7 @@ class uploader(object):
 
         self.dump_board_info()
 
-        if self.fw_maxsize < fw.property("image_size") or self.extf_maxsize < fw.property(
-            "extf_image_size", 0
-        ):
+        if self.fw_maxsize < image_size or self.extf_maxsize < extf_image_size:
             raise RuntimeError("Firmware image is too large for this board")
 
         if self.baudrate_bootloader_flash != self.baudrate_bootloader:
@@ -1244,12 +1138,12 @@ class uploader(object):
             self.port.baudrate = self.baudrate_bootloader_flash
             self.__sync()
 
-        if fw.property("extf_image_size", 0) > 0:
-            self.erase_extflash("Erase ExtF  ", fw.property("extf_image_size", 0))
+        if extf_image_size > 0:
+            self.erase_extflash("Erase ExtF  ", extf_image_size)
             self.__program_extf("Program ExtF", fw)
-            self.__verify_extf("Verify ExtF ", fw, fw.property("extf_image_size", 0))
+            self.__verify_extf("Verify ExtF ", fw, extf_image_size)
 
-        if fw.property("image_size") > 0:
+        if image_size > 0:
             self.__erase("Erase  ")
             self.__program("Program", fw)
 
@@ -1322,31 +1216,20 @@ class uploader(object):
 def ports_to_try(args):
     portlist = []
     if args.port is None:
-        patterns = default_ports
+        patterns = _default_port_patterns()
     else:
         patterns = args.port.split(",")
     # use glob to support wildcard ports. This allows the use of
     # /dev/serial/by-id/usb-ArduPilot on Linux, which prevents the
     # upload from causing modem hangups etc
-    if "linux" in _platform or "darwin" in _platform or "cygwin" in _platform:
-        import glob
-
-        for pattern in patterns:
-            portlist += sorted(glob.glob(pattern))
+    if _GLOB_PORTS:
+        portlist = _expand_port_patterns(patterns)
     else:
         portlist = patterns
 
     # filter ports based on platform:
-    if "cygwin" in _platform:
-        # Cygwin, don't open MAC OS and Win ports, we are more like
-        # Linux. Cygwin needs to be before Windows test
-        pass
-    elif "darwin" in _platform:
-        # OS X, don't open Windows and Linux ports
-        portlist = [port for port in portlist if "COM" not in port and "ACM" not in port]
-    elif "win" in _platform:
-        # Windows, don't open POSIX ports
-        portlist = [port for port in portlist if "/" not in port]
+    if _port_filter is not None:
+        portlist = list(filter(_port_filter, portlist))
 
     return portlist
 
@@ -1356,36 +1239,94 @@ def modemmanager_check():
     pass
 
 
+def _identify(up, port):
+    """open the port and ask for a bootloader, without rebooting anything"""
+    up.open()
+
+    # port is open, try talking to it
+    try:
+        # identify the bootloader
+        up.identify()
+        print(
+            "Found board %x,%x bootloader rev %x on %s"
+            % (up.board_type, up.board_rev, up.bl_rev, port)
+        )
+        return True
+
+    except Exception:
+        return False
+
+
+def _reboot_and_close(up):
+    """ask the flightstack to reboot into its bootloader and close the port,
+    returns False once every flightstack baudrate has been tried"""
+    reboot_sent = up.send_reboot()
+
+    # wait for the reboot, without we might run into Serial I/O Error 5.
+    # Nothing to wait for when there was no reboot left to send
+    if reboot_sent:
+        time.sleep(0.25)
+
+    # always close the port
+    up.close()
+
+    # wait for the close, without we might run into Serial I/O Error 6
+    time.sleep(0.3)
+
+    return reboot_sent
+
+
 def find_bootloader(up, port):
     while True:
-        up.open()
-
-        # port is open, try talking to it
-        try:
-            # identify the bootloader
-            up.identify()
-            print(
-                "Found board %x,%x bootloader rev %x on %s"
-                % (up.board_type, up.board_rev, up.bl_rev, port)
-            )
+        if _identify(up, port):
             return True
 
-        except Exception:
-            pass
+        if not _reboot_and_close(up):
+            return False
 
-        reboot_sent = up.send_reboot()
 
-        # wait for the reboot, without we might run into Serial I/O Error 5
-        time.sleep(0.25)
+def _open_and_identify(port, args, baud_flightstack):
+    """create an uploader attached to port and check for a bootloader already
+    running on it, returns (port, uploader, found) or None if it can't be created"""
+    try:
+        up = uploader(
+            port,
+            args.baud_bootloader,
+            baud_flightstack,
+            args.baud_bootloader_flash,
+            args.target_system,
+            args.target_component,
+            args.source_system,
+            args.source_component,
+            args.no_extf,
+            args.force_erase,
+            pipeline_depth=args.pipeline_depth,
+        )
 
-        # always close the port
+    except Exception as e:
+        if not is_WSL and not is_WSL2 and "win32" not in _platform:
+            # open failed, WSL must cycle through all ttyS* ports quickly but rate limit everything else
+            print("Exception creating uploader: %s" % str(e))
+            time.sleep(0.05)
+        return None
+
+    try:
+        return port, up, _identify(up, port)
+    except Exception:
         up.close()
+        raise
 
-        # wait for the close, without we might run into Serial I/O Error 6
-        time.sleep(0.3)
 
-        if not reboot_sent:
-            return False
+def _unique_ports(ports):
+    """drop ports that are another name for a device already listed (by-id links etc.)"""
+    seen = set()
+    unique = []
+    for port in ports:
+        device = os.path.realpath(port)
+        if device not in seen:
+            seen.add(device)
+            unique.append(port)
+    return unique
 
 
 def main():
@@ -1480,6 +1421,12 @@ def main():
         action="store_true",
         help="Do not check for pre cleared flash, always erase the chip",
     )
+    parser.add_argument(
+        "--pipeline-depth",
+        type=int,
+        default=1,
+        help="Number of program commands to send before waiting for the bootloader to acknowledge (default is 1)",  # NOQA
+    )
     parser.add_argument(
         "firmware",
         nargs="?",
@@ -1515,66 +1462,66 @@ def main():
     try:
         while True:
 
-            for port in ports_to_try(args):
-
-                # print("Trying %s" % port)
-
-                # create an uploader attached to the port
-                try:
-                    up = uploader(
-                        port,
-                        args.baud_bootloader,
-                        baud_flightstack,
-                        args.baud_bootloader_flash,
-                        args.target_system,
-                        args.target_component,
-                        args.source_system,
-                        args.source_component,
-                        args.no_extf,
-                        args.force_erase,
-                    )
-
-                except Exception as e:
-                    if not is_WSL and not is_WSL2 and "win32" not in _platform:
-                        # open failed, WSL must cycle through all ttyS* ports quickly but rate limit everything else
-                        print("Exception creating uploader: %s" % str(e))
-                        time.sleep(0.05)
-
-                    # and loop to the next port
-                    continue
-
-                if not find_bootloader(up, port):
-                    # Go to the next port
-                    continue
+            # identify all candidate ports at once, each waits on its own serial I/O.
+            # This only talks to bootloaders, nothing gets rebooted here
+            ports = _unique_ports(ports_to_try(args))
+            futures = []
+            try:
+                if ports:
+                    with ThreadPoolExecutor(max_workers=min(8, len(ports))) as executor:
+                        for port in ports:
+                            futures.append(
+                                executor.submit(_open_and_identify, port, args, baud_flightstack)
+                            )
+                probes = [future.result() for future in futures]
+                probes = [probe for probe in probes if probe is not None]
+
+                # keep the port priority order when picking a board
+                board = next((up for _, up, found in probes if found), None)
+                if board is None:
+                    # no bootloader running yet, reboot one board at a time and
+                    # stop at the first that comes back in its bootloader
+                    for port, up, _ in probes:
+                        if _reboot_and_close(up) and find_bootloader(up, port):
+                            board = up
+                            break
+
+                if board is not None:
+                    up = board
+                    try:
+                        # ok, we have a bootloader, try flashing it
+                        if args.identify:
+                            up.dump_board_info()
+                        elif args.download:
+                            up.download(args.firmware)
+                        elif args.verify_firmware_is:
+                            up.verify_firmware_is(fw, boot_delay=args.boot_delay)
+                        elif args.erase_extflash:
+                            up.erase_extflash("Erase ExtF", args.erase_extflash)
+                            print("\nExtF Erase Finished")
+                        else:
+                            up.upload(fw, force=args.force, boot_delay=args.boot_delay)
+
+                    except RuntimeError as ex:
+                        # print the error and exit as a failure
+                        sys.exit("\nERROR: %s" % ex.args)
+
+                    except IOError:
+                        # try again on the next pass
+                        up.close()
 
-                try:
-                    # ok, we have a bootloader, try flashing it
-                    if args.identify:
-                        up.dump_board_info()
-                    elif args.download:
-                        up.download(args.firmware)
-                    elif args.verify_firmware_is:
-                        up.verify_firmware_is(fw, boot_delay=args.boot_delay)
-                    elif args.erase_extflash:
-                        up.erase_extflash("Erase ExtF", args.erase_extflash)
-                        print("\nExtF Erase Finished")
                     else:
-                        up.upload(fw, force=args.force, boot_delay=args.boot_delay)
-
-                except RuntimeError as ex:
-                    # print the error and exit as a failure
-                    sys.exit("\nERROR: %s" % ex.args)
-
-                except IOError:
-                    up.close()
-                    continue
-
-                finally:
-                    # always close the port
-                    up.close()
-
-                # we could loop here if we wanted to wait for more boards...
-                sys.exit(0)
+                        # we could loop here if we wanted to wait for more boards...
+                        sys.exit(0)
+
+                    finally:
+                        # always close the port
+                        up.close()
+            finally:
+                # release every port opened in this pass, whichever way it ends
+                for future in futures:
+                    if future.done() and future.exception() is None and future.result():
+                        future.result()[1].close()
 
             # Delay retries to < 20 Hz to prevent spin-lock from hogging the CPU
             time.sleep(0.05)
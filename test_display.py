@@ -41,7 +41,7 @@ def test_progress_display():
     progress_ui.add_console_output("[VERBOSE] test2: Upload completed successfully!")
     
     time.sleep(1)
-    progress_ui.stop_live_display()
+    progress_ui.shutdown()
     
     console.print("\n[green]Test completed![/green]")
 